@@ -0,0 +1,121 @@
+import re
+
+# Detection logic shared by the Streamlit analyzer and the evaluation harness.
+
+ENTITIES = ("Profanity Detection", "Privacy and Compliance Violation")
+
+# --- Formatting ---
+
+def format_conversation_lines(conversation_data):
+    """
+    Converts the structured conversation data into one formatted line per turn.
+    """
+    if not conversation_data:
+        return []
+    
+    full_conversation = []
+    for entry in conversation_data:
+        speaker = entry.get("speaker", "Unknown")
+        text = entry.get("text", "")
+        stime = entry.get("stime", 0)
+        etime = entry.get("etime", 0)
+        full_conversation.append(f"[{stime}-{etime}] {speaker}: {text}")
+        
+    return full_conversation
+
+def format_conversation_to_string(conversation_data):
+    """
+    Converts the structured conversation data into a single formatted string.
+    """
+    return "\n".join(format_conversation_lines(conversation_data))
+
+# --- Analysis Functions ---
+
+# Simple regex for common profane words (add more as needed)
+# Using \b for word boundaries to avoid matching words like "assist"
+PROFANITY_PATTERN = re.compile(
+    r'\b('
+    r'hell|damn|ass(hole)?|bitch|'
+    r'fuck(er|ing|ed)?|shit(ty)?|'
+    r'crap|piss(ed)?|bastard|cunt|dick|prick'
+    r')\b',
+    re.IGNORECASE
+)
+
+# Regex to find sensitive info like 'balance' or 'account'
+SENSITIVE_INFO_PATTERN = re.compile(r'\b(balance|account details)\b', re.IGNORECASE)
+
+# Regex to find verification phrases
+VERIFICATION_PATTERN = re.compile(r'\b(date of birth|address|social security number|ssn)\b', re.IGNORECASE)
+
+def analyze_with_regex(conversation_text, entity):
+    """
+    Analyzes the conversation using regular expressions based on the selected entity.
+    """
+    if entity == "Profanity Detection":
+        if PROFANITY_PATTERN.search(conversation_text):
+            return "Found"
+        return "Not Found"
+
+    elif entity == "Privacy and Compliance Violation":
+        sensitive_match = SENSITIVE_INFO_PATTERN.search(conversation_text)
+        
+        if sensitive_match:
+            # Check if any verification phrase appears *before* the sensitive info
+            text_before_sensitive = conversation_text[:sensitive_match.start()]
+            if VERIFICATION_PATTERN.search(text_before_sensitive):
+                # Verification happened before sensitive info was shared
+                return "Not Found"
+            else:
+                # Sensitive info shared without prior verification
+                return "Found"
+        return "Not Found"
+        
+    return "Not Applicable"
+
+def find_flagged_turns(conversation_lines, entity):
+    """
+    Returns the indices of the turns the regex rules point at, used to highlight
+    the transcript viewer.
+    """
+    if entity == "Profanity Detection":
+        return [i for i, line in enumerate(conversation_lines) if PROFANITY_PATTERN.search(line)]
+
+    if entity == "Privacy and Compliance Violation":
+        # Same rule as analyze_with_regex: the first sensitive turn is a violation
+        # unless a verification phrase came before it
+        for i, line in enumerate(conversation_lines):
+            sensitive_match = SENSITIVE_INFO_PATTERN.search(line)
+            if sensitive_match:
+                if VERIFICATION_PATTERN.search(line[:sensitive_match.start()]):
+                    return []
+                return [i]
+            if VERIFICATION_PATTERN.search(line):
+                return []
+    return []
+
+# --- LLM Prompts ---
+
+LLM_MODEL_NAME = "openai/gpt-oss-20b"
+
+LLM_PROMPT_TEMPLATES = {
+    "Profanity Detection": """
+            You are a call transcript analyst. Your task is to detect profanity in the following conversation.
+            Analyze the text and determine if any speaker uses profane language.
+            Respond with only "Found" or "Not Found".
+
+            Conversation:
+            {conversation}
+            """,
+    "Privacy and Compliance Violation": """
+            You are a compliance analyst. Your task is to detect privacy violations in a call transcript.
+            A violation occurs if an agent shares sensitive information like a balance or account details
+            BEFORE verifying the customer's identity (e.g., asking for date of birth, address, or Social Security Number).
+
+            Analyze the conversation below. Does the agent share sensitive information before identity verification?
+            Respond with only "Found" if a violation occurred, or "Not Found" if it did not.
+
+            Conversation:
+            {conversation}
+            """,
+}
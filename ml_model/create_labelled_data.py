@@ -14,6 +14,7 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 # Define the folder containing the JSON files and the output CSV file name
 CONVERSATIONS_DIR = "/home/ambuj/projects/prodigal_assignment/All_Conversations"
 OUTPUT_CSV_FILE = "../labeled_conversations.csv"
+CSV_FIELDNAMES = ['conversation_id', 'conversation', 'profanity', 'sensitive_data_compliance']
 
 # --- 2. HELPER FUNCTIONS ---
 
@@ -96,6 +97,30 @@ def analyze_conversation_with_llm(conversation_text):
 
 # --- 3. MAIN SCRIPT LOGIC ---
 
+def label_conversation(conversation_id, conversation_data):
+    """
+    Labels a single parsed conversation with the LLM and returns its CSV row.
+    """
+    # Format the conversation for the LLM
+    conversation_text = format_conversation_to_string(conversation_data)
+    
+    # Get the analysis from the LLM
+    if conversation_text:
+        print("  > Sending to LLM for analysis...")
+        analysis = analyze_conversation_with_llm(conversation_text)
+        print(f"  > Received labels: {analysis}")
+    else:
+        analysis = {'profanity': 'Not Found', 'sensitive_data_compliance': 'Not Found'}
+        print("  > Empty conversation, skipping LLM call.")
+
+    # Prepare row for CSV
+    return {
+        'conversation_id': conversation_id,
+        'conversation': json.dumps(conversation_data), # Store the full JSON as a string
+        'profanity': analysis.get('profanity', 'Error'),
+        'sensitive_data_compliance': analysis.get('sensitive_data_compliance', 'Error')
+    }
+
 def process_all_conversations():
     """
     Main function to find, process, and label all conversations,
@@ -114,8 +139,7 @@ def process_all_conversations():
 
     # Open the CSV file to write the results
     with open(OUTPUT_CSV_FILE, mode='w', newline='', encoding='utf-8') as csv_file:
-        fieldnames = ['conversation_id', 'conversation', 'profanity', 'sensitive_data_compliance']
-        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDNAMES)
         
         writer.writeheader()
 
@@ -130,26 +154,7 @@ def process_all_conversations():
                 with open(file_path, 'r', encoding='utf-8') as f:
                     conversation_data = json.load(f)
                 
-                # Format the conversation for the LLM
-                conversation_text = format_conversation_to_string(conversation_data)
-                
-                # Get the analysis from the LLM
-                if conversation_text:
-                    print("  > Sending to LLM for analysis...")
-                    analysis = analyze_conversation_with_llm(conversation_text)
-                    print(f"  > Received labels: {analysis}")
-                else:
-                    analysis = {'profanity': 'Not Found', 'sensitive_data_compliance': 'Not Found'}
-                    print("  > Empty conversation, skipping LLM call.")
-
-                # Prepare row for CSV
-                row = {
-                    'conversation_id': conversation_id,
-                    'conversation': json.dumps(conversation_data), # Store the full JSON as a string
-                    'profanity': analysis.get('profanity', 'Error'),
-                    'sensitive_data_compliance': analysis.get('sensitive_data_compliance', 'Error')
-                }
-                
+                row = label_conversation(conversation_id, conversation_data)
                 writer.writerow(row)
                 
                 # A small delay to avoid hitting API rate limits too quickly
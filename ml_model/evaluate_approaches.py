@@ -0,0 +1,397 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from ml_model.approaches import (ENTITIES, LLM_MODEL_NAME,
+                                 LLM_PROMPT_TEMPLATES, analyze_with_regex,
+                                 format_conversation_to_string)
+
+# --- 1. SETUP ---
+# Paths are relative to the repository root, like the ones in predictor.py
+LABELED_CSV_FILE = "labeled_conversations.csv"
+REPORT_FILE = "evaluation_report.json"
+LLM_RECORDINGS_FILE = "ml_model/llm_recordings.json"
+
+# Ground-truth column for each entity in the labeled CSV
+ENTITY_LABEL_COLUMNS = {
+    "Profanity Detection": "profanity",
+    "Privacy and Compliance Violation": "sensitive_data_compliance",
+}
+
+# Labels that count as a positive ("violation present") prediction or ground truth
+POSITIVE_LABELS = ("found", "violation")
+
+# Token cost estimate for the LLM approach. Tokens are approximated from the
+# character count; prices are USD per million tokens for the Groq model.
+CHARS_PER_TOKEN = 4
+LLM_INPUT_COST_PER_MILLION = 0.10
+LLM_OUTPUT_COST_PER_MILLION = 0.50
+
+# Parallel requests for the LLM approach; regex and ML are CPU bound and run
+# single threaded, one approach at a time, so their latencies are measured unloaded
+LLM_WORKERS = 8
+
+# Simulated latency of the fake LLM backend: a fixed overhead per request plus
+# a per-token processing time
+FAKE_LLM_BASE_LATENCY_S = 0.05
+FAKE_LLM_SECONDS_PER_1K_TOKENS = 0.05
+
+# --- 2. HELPER FUNCTIONS ---
+
+def is_positive(label):
+    """
+    Maps a label or model response ("Found", "Not Found", "Violation", "found.", ...)
+    to a boolean. Returns None for anything unrecognised, e.g. "Error".
+    """
+    if label is None:
+        return None
+    label = str(label).strip().strip('*."\'').lower()
+    if label.startswith("not"):
+        return False
+    if label.startswith(POSITIVE_LABELS):
+        return True
+    return None
+
+def estimate_tokens(text):
+    """
+    Rough token count used for cost estimates.
+    """
+    return len(text) // CHARS_PER_TOKEN
+
+def load_labeled_conversations(csv_file):
+    """
+    Loads the labeled dataset as a list of dicts with the parsed conversation
+    and a boolean ground truth per entity.
+    """
+    conversations = []
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            conversations.append({
+                'conversation_id': row['conversation_id'],
+                'conversation_data': json.loads(row['conversation']),
+                'labels': {
+                    entity: is_positive(row[column])
+                    for entity, column in ENTITY_LABEL_COLUMNS.items()
+                },
+            })
+    return conversations
+
+def compute_metrics(pairs):
+    """
+    Computes precision, recall and F1 from (predicted, actual) boolean pairs.
+    """
+    tp = sum(1 for predicted, actual in pairs if predicted and actual)
+    fp = sum(1 for predicted, actual in pairs if predicted and not actual)
+    fn = sum(1 for predicted, actual in pairs if not predicted and actual)
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'support': tp + fn}
+
+# --- 3. APPROACHES ---
+# Each approach exposes predict(conversation, entity) returning
+# (response, latency_s, input_tokens, output_tokens); response is None on failure.
+# `entities` lists the entities it can evaluate and `skipped_entities` maps the
+# others to the reason they are unavailable. `simulated` marks approaches whose
+# answers and latencies are stand-ins rather than measurements.
+
+class RegexApproach:
+    name = "Pattern Matching (Regex)"
+    max_workers = 1
+    entities = ENTITIES
+    skipped_entities = {}
+    simulated = False
+
+    def predict(self, conversation, entity):
+        start = time.perf_counter()
+        conversation_text = format_conversation_to_string(conversation['conversation_data'])
+        response = analyze_with_regex(conversation_text, entity)
+        return response, time.perf_counter() - start, 0, 0
+
+class MLApproach:
+    name = "Machine Learning"
+    max_workers = 1
+    simulated = False
+
+    def __init__(self):
+        # Imported here so the other approaches can be evaluated without TensorFlow
+        from ml_model.predictor import CallAnalysisPredictor
+
+        self.predictor = CallAnalysisPredictor()
+
+        # Each model loads on its own, so a missing model file only skips its entity
+        loaders = {
+            "Profanity Detection": self.predictor.load_profanity_model,
+            "Privacy and Compliance Violation": self.predictor.load_sensitive_model,
+        }
+        self.entities = []
+        self.skipped_entities = {}
+        for entity, load_model in loaders.items():
+            try:
+                load_model()
+                self.entities.append(entity)
+            except Exception as e:
+                self.skipped_entities[entity] = str(e)
+
+    def predict(self, conversation, entity):
+        start = time.perf_counter()
+        conversation_json = json.dumps(conversation['conversation_data'], ensure_ascii=False)
+        if entity == "Profanity Detection":
+            response = self.predictor.predict_profanity(conversation_json)
+        else:
+            response = self.predictor.predict_sensitive_data(conversation_json)
+        return response, time.perf_counter() - start, 0, 0
+
+class LLMApproach:
+    """
+    LLM approach with a choice of backend:
+      - "recorded": replays responses and their original latencies from the
+        recordings file, so the evaluation is free and deterministic
+      - "fake": a deterministic stand-in that needs no API key or recordings.
+        It answers with the shared regex rules and simulates latency from the
+        prompt size. It exercises the LLM path end to end, but its quality
+        metrics are reported as null because they would only copy the regex rows
+      - "groq": calls the Groq model and records every response
+    """
+    name = "LLM (Groq)"
+    max_workers = LLM_WORKERS
+    entities = ENTITIES
+    skipped_entities = {}
+    simulated = False
+
+    def __init__(self, recordings_file, backend="recorded", replay_latency=True):
+        self.recordings_file = recordings_file
+        self.backend = backend
+        self.live = backend == "groq"
+        if backend == "fake":
+            # Keep fake numbers from being mistaken for real Groq results
+            self.name = "LLM (fake)"
+            self.simulated = True
+        self.replay_latency = replay_latency
+        self.recordings = {}
+        if backend == "fake":
+            pass
+        elif os.path.exists(recordings_file):
+            with open(recordings_file, 'r', encoding='utf-8') as f:
+                self.recordings = json.load(f)
+        elif not self.live:
+            raise FileNotFoundError(
+                f"No LLM recordings at '{recordings_file}'. Run once with --llm-backend groq to record them."
+            )
+
+        self.chains = {}
+        if self.live:
+            from langchain.prompts import PromptTemplate
+            from langchain_core.output_parsers import StrOutputParser
+            from langchain_groq import ChatGroq
+
+            llm = ChatGroq(model_name=LLM_MODEL_NAME, temperature=0, max_tokens=None)
+            for entity, template in LLM_PROMPT_TEMPLATES.items():
+                prompt = PromptTemplate(template=template, input_variables=["conversation"])
+                self.chains[entity] = prompt | llm | StrOutputParser()
+
+    def predict(self, conversation, entity):
+        conversation_text = format_conversation_to_string(conversation['conversation_data'])
+        input_tokens = estimate_tokens(LLM_PROMPT_TEMPLATES[entity].format(conversation=conversation_text))
+
+        if self.live:
+            start = time.perf_counter()
+            try:
+                response = self.chains[entity].invoke({"conversation": conversation_text})
+            except Exception as e:
+                print(f"  [Error] LLM call failed for {conversation['conversation_id']}: {e}")
+                return None, time.perf_counter() - start, input_tokens, 0
+            latency = time.perf_counter() - start
+            self.recordings.setdefault(conversation['conversation_id'], {})[entity] = {
+                'response': response,
+                'latency_s': latency,
+            }
+        elif self.backend == "fake":
+            response = analyze_with_regex(conversation_text, entity)
+            latency = FAKE_LLM_BASE_LATENCY_S + FAKE_LLM_SECONDS_PER_1K_TOKENS * input_tokens / 1000
+            if self.replay_latency:
+                time.sleep(latency)
+        else:
+            recording = self.recordings.get(conversation['conversation_id'], {}).get(entity)
+            if recording is None:
+                return None, 0.0, 0, 0
+            response = recording['response']
+            latency = recording['latency_s']
+            if self.replay_latency:
+                time.sleep(latency)
+
+        return response, latency, input_tokens, estimate_tokens(response)
+
+    def save_recordings(self):
+        if self.live:
+            with open(self.recordings_file, 'w', encoding='utf-8') as f:
+                json.dump(self.recordings, f, indent=2)
+
+# --- 4. EVALUATION ---
+
+def evaluate_entity(approach, conversations, entity):
+    """
+    Runs one approach over every conversation for one entity and summarises
+    quality, speed and cost.
+    """
+    def run(conversation):
+        return approach.predict(conversation, entity)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=approach.max_workers) as executor:
+        outputs = list(executor.map(run, conversations))
+    wall_time = time.perf_counter() - start
+
+    pairs = []
+    latencies = []
+    input_tokens = output_tokens = errors = 0
+    for conversation, (response, latency, tokens_in, tokens_out) in zip(conversations, outputs):
+        predicted = is_positive(response)
+        actual = conversation['labels'][entity]
+        input_tokens += tokens_in
+        output_tokens += tokens_out
+        if predicted is None or actual is None:
+            errors += 1
+            continue
+        pairs.append((predicted, actual))
+        latencies.append(latency)
+
+    cost = (
+        input_tokens * LLM_INPUT_COST_PER_MILLION + output_tokens * LLM_OUTPUT_COST_PER_MILLION
+    ) / 1_000_000
+
+    result = {'approach': approach.name, 'entity': entity, 'simulated': approach.simulated}
+    metrics = compute_metrics(pairs)
+    if approach.simulated:
+        # Simulated answers say nothing about quality; keep them out of the tracked history
+        metrics.update({'precision': None, 'recall': None, 'f1': None})
+    result.update(metrics)
+    result.update({
+        'evaluated': len(pairs),
+        'errors': errors,
+        'mean_latency_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        'throughput_per_s': len(conversations) / wall_time if wall_time else 0.0,
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'estimated_cost_usd': cost,
+    })
+    return result
+
+def evaluate_approach(approach, conversations):
+    results = [evaluate_entity(approach, conversations, entity) for entity in approach.entities]
+    if isinstance(approach, LLMApproach):
+        approach.save_recordings()
+    return results
+
+def format_table(results):
+    """
+    Renders the results as a plain-text table.
+    """
+    columns = [
+        ('approach', 'Approach', '{}'),
+        ('entity', 'Entity', '{}'),
+        ('precision', 'Precision', '{:.3f}'),
+        ('recall', 'Recall', '{:.3f}'),
+        ('f1', 'F1', '{:.3f}'),
+        ('support', 'Support', '{}'),
+        ('errors', 'Errors', '{}'),
+        ('mean_latency_ms', 'Latency (ms)', '{:.2f}'),
+        ('throughput_per_s', 'Calls/s', '{:.1f}'),
+        ('estimated_cost_usd', 'Est. cost ($)', '{:.4f}'),
+    ]
+    rows = [[header for _, header, _ in columns]]
+    for result in results:
+        rows.append([
+            "n/a" if result[key] is None else fmt.format(result[key])
+            for key, _, fmt in columns
+        ])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+# --- 5. MAIN SCRIPT LOGIC ---
+
+def evaluate_approaches(labeled_csv_file=LABELED_CSV_FILE, report_file=REPORT_FILE,
+                        llm_backend="auto", llm_recordings_file=LLM_RECORDINGS_FILE,
+                        replay_latency=True):
+    """
+    Evaluates every approach against the labeled dataset, prints a comparison
+    table and writes it as a JSON report.
+    """
+    conversations = load_labeled_conversations(labeled_csv_file)
+    print(f"Loaded {len(conversations)} labeled conversations from '{labeled_csv_file}'.")
+
+    if llm_backend == "auto":
+        llm_backend = "recorded" if os.path.exists(llm_recordings_file) else "fake"
+        print(f"Using the '{llm_backend}' LLM backend.")
+
+    approaches = [RegexApproach()]
+    skipped = {}
+    try:
+        approaches.append(MLApproach())
+    except Exception as e:
+        skipped[MLApproach.name] = str(e)
+    try:
+        approaches.append(LLMApproach(
+            llm_recordings_file, backend=llm_backend, replay_latency=replay_latency
+        ))
+    except Exception as e:
+        skipped[LLMApproach.name] = str(e)
+
+    for approach in approaches:
+        for entity, reason in approach.skipped_entities.items():
+            skipped[f"{approach.name} / {entity}"] = reason
+
+    for name, reason in skipped.items():
+        print(f"  [Skipped] {name}: {reason}")
+
+    # Approaches run one after another so the CPU-bound regex and ML latencies are
+    # not inflated by GIL contention; the LLM approach parallelises its own requests
+    results = []
+    for approach in approaches:
+        results.extend(evaluate_approach(approach, conversations))
+
+    print()
+    print(format_table(results))
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'labeled_csv': labeled_csv_file,
+        'conversations': len(conversations),
+        'llm_backend': llm_backend,
+        'llm_model': LLM_MODEL_NAME,
+        'skipped': skipped,
+        'results': results,
+    }
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Evaluation report saved to '{report_file}'.")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the regex, ML and LLM approaches on the labeled dataset.")
+    parser.add_argument("--labeled-csv", default=LABELED_CSV_FILE)
+    parser.add_argument("--output", default=REPORT_FILE)
+    parser.add_argument("--llm-backend", choices=["auto", "recorded", "fake", "groq"], default="auto",
+                        help="'recorded' replays saved LLM responses; 'fake' is a deterministic offline stand-in; "
+                             "'groq' calls the API and records them. 'auto' uses recordings if present, else fake.")
+    parser.add_argument("--llm-recordings", default=LLM_RECORDINGS_FILE)
+    parser.add_argument("--no-replay-latency", action="store_true",
+                        help="Return recorded or fake LLM responses instantly instead of sleeping for their latency.")
+    args = parser.parse_args()
+
+    evaluate_approaches(
+        labeled_csv_file=args.labeled_csv,
+        report_file=args.output,
+        llm_backend=args.llm_backend,
+        llm_recordings_file=args.llm_recordings,
+        replay_latency=not args.no_replay_latency,
+    )
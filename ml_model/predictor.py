@@ -17,6 +17,11 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.optimizers import Adam
 
 
+# The Keras sensitive data model needs dense input, so window batches are
+# densified this many rows at a time to keep memory bounded
+SENSITIVE_DENSE_CHUNK_SIZE = 256
+
+
 class CallAnalysisPredictor:
     """
     Class for making predictions on new data
@@ -30,11 +35,20 @@ class CallAnalysisPredictor:
         """
         Load trained models
         """
-        # Load profanity model
+        self.load_profanity_model()
+        self.load_sensitive_model()
+    
+    def load_profanity_model(self):
+        """
+        Load the profanity model on its own
+        """
         with open('ml_model/profanity_model.pkl', 'rb') as f:
             self.profanity_components = pickle.load(f)
-        
-        # Load sensitive data model
+    
+    def load_sensitive_model(self):
+        """
+        Load the sensitive data model and its vectorizer on their own
+        """
         self.sensitive_model = tf.keras.models.load_model('ml_model/sensitive_model.h5')
         
         with open('ml_model/sensitive_vectorizer.pkl', 'rb') as f:
@@ -57,14 +71,34 @@ class CallAnalysisPredictor:
                     all_text.append(item['text'])
             
             combined_text = " ".join(all_text)
-            combined_text = combined_text.lower()
-            combined_text = re.sub(r'[^\w\s]', ' ', combined_text)
-            combined_text = re.sub(r'\s+', ' ', combined_text).strip()
             
-            return combined_text
+            return self.clean_text(combined_text)
         except:
             return ""
     
+    def clean_text(self, text):
+        """
+        Lowercases text and strips punctuation and extra whitespace
+        """
+        text = text.lower()
+        text = re.sub(r'[^\w\s]', ' ', text)
+        text = re.sub(r'\s+', ' ', text).strip()
+        return text
+    
+    def preprocess_json_turns(self, json_string):
+        """
+        Preprocess JSON input into one clean text per turn
+        Args:
+            json_string: JSON string of conversation
+        Returns:
+            turns: List of clean turn texts, in conversation order
+        """
+        try:
+            conversation_list = json.loads(json_string)
+            return [self.clean_text(item.get('text', '')) for item in conversation_list]
+        except:
+            return []
+    
     def predict_profanity(self, json_string):
         """
         Predict profanity in conversation
@@ -98,4 +132,123 @@ class CallAnalysisPredictor:
         # Convert to binary classification
         result = "found" if prediction > 0.5 else "not found"
         
-        return result
\ No newline at end of file
+        return result
+    
+    def score_profanity_texts(self, texts):
+        """
+        Probability of profanity for each text, scored in one model invocation
+        """
+        text_tfidf = self.profanity_components['vectorizer'].transform(texts)
+        probabilities = self.profanity_components['model'].predict_proba(text_tfidf)
+        
+        # Column of predict_proba that holds the "Found" class. The saved encoder's
+        # classes are ['Found', 'Not Found', 'Violation'], so decode the model's
+        # classes instead of assuming a spelling
+        label_classes = self.profanity_components['label_encoder'].classes_
+        found_columns = [
+            column for column, encoded in enumerate(self.profanity_components['model'].classes_)
+            if str(label_classes[encoded]).lower() == 'found'
+        ]
+        if not found_columns:
+            raise ValueError(f"Profanity model has no 'Found' class among {list(label_classes)}")
+        
+        return probabilities[:, found_columns[0]]
+    
+    def score_sensitive_texts(self, texts):
+        """
+        Probability of a sensitive data violation for each text. The texts are
+        vectorized into one sparse matrix, then densified and scored in chunks
+        of SENSITIVE_DENSE_CHUNK_SIZE rows, so memory does not grow with the batch
+        """
+        text_tfidf = self.sensitive_vectorizer.transform(texts)
+        
+        scores = []
+        for start in range(0, text_tfidf.shape[0], SENSITIVE_DENSE_CHUNK_SIZE):
+            chunk = text_tfidf[start:start + SENSITIVE_DENSE_CHUNK_SIZE].toarray()
+            scores.append(self.sensitive_model.predict(chunk, batch_size=len(chunk), verbose=0)[:, 0])
+        
+        return np.concatenate(scores)
+    
+    def localize(self, json_strings, score_texts, window_size=3, stride=1, top_k=3):
+        """
+        Scores each turn by how much it drives a prediction.
+        
+        Every turn gets a window of window_size turns centred on it, padded
+        with empty turns at the edges of the call, and the same window with the
+        turn itself left out. The turn's score is how much removing it lowers
+        the window's score, clipped at 0. Neighbours that merely share a window
+        with an offending turn therefore score near 0, including at the edges
+        and in calls shorter than window_size.
+        
+        The windows of every call are stacked into a single sparse TF-IDF matrix
+        and scored as one batch, however many calls and windows there are.
+        Args:
+            json_strings: List of JSON strings, one per conversation
+            score_texts: Batch scoring method, e.g. self.score_profanity_texts
+            window_size: Number of consecutive turns per window, at least 1
+            stride: Score every stride-th turn, from 1 up to window_size; turns
+                    in between get NaN and are left out of top_turns
+            top_k: Number of top scoring turns to return per call
+        Returns:
+            results: One dict per call with 'turn_scores' (a score per turn)
+                     and 'top_turns' (list of (turn_index, score), highest first)
+        """
+        if window_size < 1:
+            raise ValueError(f"window_size must be at least 1, got {window_size}")
+        if stride < 1:
+            raise ValueError(f"stride must be at least 1, got {stride}")
+        if stride > window_size:
+            raise ValueError(f"stride must not exceed window_size ({window_size}), got {stride}")
+        
+        # Turns before and after the centre turn of each window
+        before = (window_size - 1) // 2
+        after = window_size - 1 - before
+        
+        all_windows = []
+        centres_per_call = []
+        turn_counts = []
+        
+        for json_string in json_strings:
+            turns = self.preprocess_json_turns(json_string)
+            turn_counts.append(len(turns))
+            padded = [""] * before + turns + [""] * after
+            centres = list(range(0, len(turns), stride))
+            for centre in centres:
+                window = padded[centre:centre + window_size]
+                without_centre = window[:before] + window[before + 1:]
+                all_windows.append(" ".join(turn for turn in window if turn))
+                all_windows.append(" ".join(turn for turn in without_centre if turn))
+            centres_per_call.append(centres)
+        
+        window_scores = score_texts(all_windows) if all_windows else np.array([])
+        
+        results = []
+        offset = 0
+        for turn_count, centres in zip(turn_counts, centres_per_call):
+            turn_scores = np.full(turn_count, np.nan)
+            for k, centre in enumerate(centres):
+                with_turn = window_scores[offset + 2 * k]
+                without_turn = window_scores[offset + 2 * k + 1]
+                turn_scores[centre] = max(with_turn - without_turn, 0.0)
+            offset += 2 * len(centres)
+            
+            ranked = np.argsort(-np.nan_to_num(turn_scores, nan=-np.inf), kind='stable')
+            top_turns = [int(i) for i in ranked if not np.isnan(turn_scores[i])][:top_k]
+            results.append({
+                'turn_scores': turn_scores.tolist(),
+                'top_turns': [(i, float(turn_scores[i])) for i in top_turns],
+            })
+        
+        return results
+    
+    def localize_profanity(self, json_strings, window_size=3, stride=1, top_k=3):
+        """
+        Per-turn profanity scores for one or more conversations
+        """
+        return self.localize(json_strings, self.score_profanity_texts, window_size, stride, top_k)
+    
+    def localize_sensitive_data(self, json_strings, window_size=3, stride=1, top_k=3):
+        """
+        Per-turn sensitive data violation scores for one or more conversations
+        """
+        return self.localize(json_strings, self.score_sensitive_texts, window_size, stride, top_k)
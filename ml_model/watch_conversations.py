@@ -0,0 +1,525 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import queue
+import time
+
+from create_labelled_data import (CONVERSATIONS_DIR, CSV_FIELDNAMES,
+                                  OUTPUT_CSV_FILE, label_conversation)
+
+# watchdog gives us inotify on Linux (and the native backends elsewhere).
+# It is optional: without it the watcher falls back to polling the folder.
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# --- 1. SETUP ---
+# Each CSV row stores a whole conversation as JSON in one field, which long calls
+# push past csv's default 128 KiB field limit. 2**31 - 1 fits a C long everywhere.
+csv.field_size_limit(2**31 - 1)
+
+# Journal of already labeled conversations, stored next to the labeled CSV
+INDEX_FILE = "../processed_conversations_index.jsonl"
+
+# The journal is only compacted once it has at least this many lines
+COMPACT_MIN_LINES = 1000
+
+# A small delay after each LLM call to avoid hitting API rate limits too quickly
+LLM_CALL_DELAY = 1
+
+# Files whose labeling fails are retried with exponential backoff, starting at
+# RETRY_BASE_DELAY seconds and capped at RETRY_MAX_DELAY, and given up on after
+# MAX_LABEL_ATTEMPTS failures until the file changes
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+MAX_LABEL_ATTEMPTS = 5
+
+# Seconds between folder scans when watchdog is not installed
+POLL_INTERVAL = 5
+
+# Seconds a file must stay untouched before it is picked up, so half-written
+# uploads are not parsed mid-copy
+SETTLE_TIME = 1
+
+# Seconds between full rescans in inotify mode, so files whose labeling failed
+# are retried even if no new event arrives for them
+RESCAN_INTERVAL = 60
+
+# --- 2. PROCESSED-CONTENT INDEX ---
+
+def content_hash_of(conversation_data):
+    """
+    Hashes a parsed conversation in the same serialisation the labeled CSV
+    stores, so files and existing CSV rows can be matched against each other.
+    """
+    return hashlib.sha256(json.dumps(conversation_data).encode('utf-8')).hexdigest()
+
+def load_index(index_file, output_csv_file):
+    """
+    Loads the processed-content index, or builds one from the labeled CSV.
+
+    The index has four maps:
+      - "labels": content hash -> {"profanity", "sensitive_data_compliance"}
+      - "conversations": conversation_id -> content hash of its current CSV row
+      - "files":  filename -> {"mtime_ns", "size", "hash"} of the last version seen
+      - "failures": filename -> {"mtime_ns", "size", "count", "next_retry"} for
+        files whose labeling failed
+    The "files" map lets a restart skip unchanged files with a single stat call,
+    so only new or modified files are ever read and hashed again.
+
+    On disk the index is an append-only JSONL journal: each processed file
+    appends a record or two, and loading replays them. Without an index file,
+    the index is seeded from the rows already in the labeled CSV, so a first
+    run does not relabel (and duplicate) the corpus.
+    """
+    index = {"labels": {}, "conversations": {}, "files": {}, "failures": {}, "journal_lines": 0}
+
+    if os.path.exists(index_file):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a partial last line; skip it
+                    continue
+                apply_record(index, record)
+                index["journal_lines"] += 1
+        maybe_compact_index(index, index_file)
+        return index
+
+    if os.path.exists(output_csv_file):
+        seed_index_from_csv(index, output_csv_file)
+    compact_index(index, index_file)
+    return index
+
+def apply_record(index, record):
+    """
+    Applies one journal record to the in-memory index.
+    """
+    if "conversation" in record:
+        index["labels"][record["hash"]] = record["labels"]
+        index["conversations"][record["conversation"]] = record["hash"]
+    elif "failure" in record:
+        if record.get("cleared"):
+            index["failures"].pop(record["failure"], None)
+        else:
+            index["failures"][record["failure"]] = {
+                "mtime_ns": record["mtime_ns"],
+                "size": record["size"],
+                "count": record["count"],
+                "next_retry": record["next_retry"],
+            }
+    elif "file" in record:
+        index["files"][record["file"]] = {
+            "mtime_ns": record["mtime_ns"],
+            "size": record["size"],
+            "hash": record["hash"],
+        }
+
+def conversation_record(conversation_id, content_hash, labels):
+    return {"conversation": conversation_id, "hash": content_hash, "labels": labels}
+
+def file_record(filename, stat_result, content_hash):
+    return {
+        "file": filename,
+        "mtime_ns": stat_result.st_mtime_ns,
+        "size": stat_result.st_size,
+        "hash": content_hash,
+    }
+
+def failure_record(filename, stat_result, count):
+    delay = min(RETRY_BASE_DELAY * 2 ** (count - 1), RETRY_MAX_DELAY)
+    return {
+        "failure": filename,
+        "mtime_ns": stat_result.st_mtime_ns,
+        "size": stat_result.st_size,
+        "count": count,
+        "next_retry": time.time() + delay,
+    }
+
+def append_to_index(index, index_file, records):
+    """
+    Applies records to the index and appends them to the journal, so saving
+    costs O(records) rather than O(corpus).
+    """
+    for record in records:
+        apply_record(index, record)
+    write_journal(index, index_file, records)
+
+def write_journal(index, index_file, records):
+    """
+    Appends records that are already applied in memory to the journal.
+    """
+    with open(index_file, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    index["journal_lines"] += len(records)
+
+def compact_index(index, index_file):
+    """
+    Rewrites the journal with one record per live entry, atomically so a crash
+    never leaves a truncated file behind.
+    """
+    records = [
+        conversation_record(conversation_id, content_hash, index["labels"][content_hash])
+        for conversation_id, content_hash in index["conversations"].items()
+    ]
+    records += [
+        {"file": filename, **entry}
+        for filename, entry in index["files"].items()
+    ]
+    records += [
+        {"failure": filename, **entry}
+        for filename, entry in index["failures"].items()
+    ]
+
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp_file, index_file)
+    index["journal_lines"] = len(records)
+
+def maybe_compact_index(index, index_file):
+    """
+    Compacts the journal once superseded records make up more than half of it,
+    which keeps the rewrite cost amortised O(1) per appended record.
+    """
+    live_records = len(index["conversations"]) + len(index["files"]) + len(index["failures"])
+    if index["journal_lines"] > max(2 * live_records, COMPACT_MIN_LINES):
+        compact_index(index, index_file)
+
+def seed_index_from_csv(index, output_csv_file):
+    """
+    Marks every successfully labeled row of the CSV as processed.
+    """
+    with open(output_csv_file, 'r', encoding='utf-8') as csv_file:
+        for row in csv.DictReader(csv_file):
+            if 'Error' in (row['profanity'], row['sensitive_data_compliance']):
+                continue
+            content_hash = hashlib.sha256(row['conversation'].encode('utf-8')).hexdigest()
+            apply_record(index, conversation_record(row['conversation_id'], content_hash, {
+                'profanity': row['profanity'],
+                'sensitive_data_compliance': row['sensitive_data_compliance'],
+            }))
+    print(f"Seeded index with {len(index['conversations'])} conversations from '{output_csv_file}'.")
+
+def is_unchanged(index, filename, stat_result):
+    """
+    Returns True if the file has the same mtime and size as when it was last indexed.
+    """
+    entry = index["files"].get(filename)
+    return (
+        entry is not None
+        and entry["mtime_ns"] == stat_result.st_mtime_ns
+        and entry["size"] == stat_result.st_size
+    )
+
+def append_row(row, output_csv_file):
+    """
+    Appends one labeled row to the output CSV, writing the header if the file is new.
+    """
+    write_header = not os.path.exists(output_csv_file) or os.path.getsize(output_csv_file) == 0
+    with open(output_csv_file, mode='a', newline='', encoding='utf-8') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDNAMES)
+        if write_header:
+            writer.writeheader()
+        writer.writerow(row)
+
+def replace_rows(rows_by_id, output_csv_file):
+    """
+    Replaces the rows of changed conversations in the output CSV in a single
+    rewrite, so each conversation_id keeps one up to date row. Rows whose
+    conversation_id is not in the CSV yet are appended.
+    """
+    with open(output_csv_file, 'r', newline='', encoding='utf-8') as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    pending = dict(rows_by_id)
+    updated_rows = []
+    for existing in rows:
+        conversation_id = existing['conversation_id']
+        if conversation_id not in rows_by_id:
+            updated_rows.append(existing)
+        elif conversation_id in pending:
+            updated_rows.append(pending.pop(conversation_id))
+    updated_rows.extend(pending.values())
+
+    tmp_file = output_csv_file + ".tmp"
+    with open(tmp_file, mode='w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(updated_rows)
+    os.replace(tmp_file, output_csv_file)
+
+def flush_replacements(replacements, index, index_file, output_csv_file):
+    """
+    Writes the rows of all conversations that changed during a scan, then
+    journals them. Rewriting the CSV once per scan instead of once per file
+    keeps the cost of a burst of edits at one O(corpus) pass.
+    """
+    if not replacements:
+        return
+    replace_rows({conversation_id: row for conversation_id, (row, _) in replacements.items()}, output_csv_file)
+    write_journal(index, index_file, [
+        record for _, records in replacements.values() for record in records
+    ])
+    replacements.clear()
+
+# --- 3. INGESTION ---
+
+def ingest_file(file_path, index, index_file, output_csv_file, replacements):
+    """
+    Makes sure the conversation in a file has an up to date row in the output CSV.
+
+    The LLM is only called for content that has never been labeled; content
+    already labeled under another conversation_id has its labels copied.
+
+    New rows are appended straight away. Rows of changed conversations are
+    collected in `replacements` for flush_replacements to write in one pass.
+
+    Returns True if a row was appended or queued for replacement.
+    """
+    filename = os.path.basename(file_path)
+    if not filename.endswith('.json'):
+        return False
+
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        # Deleted or renamed before we got to it
+        return False
+
+    if is_unchanged(index, filename, stat_result):
+        return False
+
+    # Back off from files whose labeling failed, until they are due or changed
+    failure = index["failures"].get(filename)
+    previous_failures = 0
+    if failure and failure["mtime_ns"] == stat_result.st_mtime_ns and failure["size"] == stat_result.st_size:
+        if failure["count"] >= MAX_LABEL_ATTEMPTS or time.time() < failure["next_retry"]:
+            return False
+        previous_failures = failure["count"]
+
+    # Skip files that are still being written; the next event or scan retries them
+    if time.time() - stat_result.st_mtime < SETTLE_TIME:
+        return False
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    try:
+        conversation_data = json.loads(content)
+    except json.JSONDecodeError:
+        # Not recorded in the index, so a later fixed version is picked up
+        print(f"  [Error] Could not decode JSON from {filename}. Skipping.")
+        return False
+    content_hash = content_hash_of(conversation_data)
+
+    conversation_id = os.path.splitext(filename)[0]
+    if index["conversations"].get(conversation_id) == content_hash:
+        print(f"  > {filename} is already labeled, skipping.")
+    else:
+        labels = index["labels"].get(content_hash)
+        if labels is not None:
+            # Same content was labeled under another conversation_id: reuse its labels
+            print(f"  > {filename} matches already labeled content, copying its labels.")
+        else:
+            print(f"\nProcessing new file: {filename}")
+            row = label_conversation(conversation_id, conversation_data)
+            labels = {
+                'profanity': row['profanity'],
+                'sensitive_data_compliance': row['sensitive_data_compliance'],
+            }
+            # A small delay to avoid hitting API rate limits too quickly
+            time.sleep(LLM_CALL_DELAY)
+
+            if 'Error' in labels.values():
+                # No row is written; the failure is recorded so the file is retried with backoff
+                count = previous_failures + 1
+                append_to_index(index, index_file, [failure_record(filename, stat_result, count)])
+                if count >= MAX_LABEL_ATTEMPTS:
+                    print(f"  [Error] Labeling failed {count} times for {filename}, giving up until it changes.")
+                else:
+                    print(f"  [Error] Labeling failed for {filename}, will retry later.")
+                return False
+
+        row = {
+            'conversation_id': conversation_id,
+            'conversation': json.dumps(conversation_data),
+            **labels,
+        }
+        records = [
+            conversation_record(conversation_id, content_hash, labels),
+            file_record(filename, stat_result, content_hash),
+        ]
+        if filename in index["failures"]:
+            records.append({"failure": filename, "cleared": True})
+        if conversation_id in index["conversations"]:
+            # The conversation changed since it was labeled: its row is replaced
+            # (and its records journaled) when the scan flushes replacements
+            for record in records:
+                apply_record(index, record)
+            replacements[conversation_id] = (row, records)
+        else:
+            append_row(row, output_csv_file)
+            append_to_index(index, index_file, records)
+        return True
+
+    records = [file_record(filename, stat_result, content_hash)]
+    if filename in index["failures"]:
+        records.append({"failure": filename, "cleared": True})
+    append_to_index(index, index_file, records)
+    return False
+
+def scan_directory(conversations_dir, index, index_file, output_csv_file):
+    """
+    Ingests every new or changed .json file in the folder.
+
+    Unchanged files cost one stat call each, so this is cheap enough to run on
+    every startup and on every poll.
+    """
+    appended = 0
+    replacements = {}
+    with os.scandir(conversations_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith('.json'):
+                continue
+            try:
+                if ingest_file(entry.path, index, index_file, output_csv_file, replacements):
+                    appended += 1
+            except Exception as e:
+                print(f"  [Error] An unexpected error occurred while processing {entry.name}: {e}")
+    flush_replacements(replacements, index, index_file, output_csv_file)
+    maybe_compact_index(index, index_file)
+    return appended
+
+# --- 4. WATCHERS ---
+
+def catch_up(conversations_dir, index, index_file, output_csv_file):
+    """
+    Labels anything that arrived while the watcher was not running.
+    """
+    appended = scan_directory(conversations_dir, index, index_file, output_csv_file)
+    print(f"Startup scan complete, {appended} new conversations labeled.")
+
+class ConversationEventHandler(FileSystemEventHandler):
+    """
+    Forwards created, modified and moved-in .json files to a queue.
+    """
+    def __init__(self, pending_paths):
+        self.pending_paths = pending_paths
+
+    def _enqueue(self, path):
+        if path.endswith('.json'):
+            self.pending_paths.put(path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._enqueue(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._enqueue(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._enqueue(event.dest_path)
+
+def watch_with_events(conversations_dir, index, index_file, output_csv_file):
+    """
+    Watches the folder with inotify (via watchdog) and ingests files as events arrive.
+    """
+    pending_paths = queue.Queue()
+    observer = Observer()
+    observer.schedule(ConversationEventHandler(pending_paths), conversations_dir, recursive=False)
+    observer.start()
+
+    # Catch up only once the observer is running, so nothing lands in between unseen
+    catch_up(conversations_dir, index, index_file, output_csv_file)
+    print(f"Watching '{conversations_dir}' for new conversations (inotify)...")
+
+    # Paths that were not settled yet when their event arrived
+    waiting = set()
+    last_rescan = time.monotonic()
+    try:
+        while True:
+            if time.monotonic() - last_rescan >= RESCAN_INTERVAL:
+                scan_directory(conversations_dir, index, index_file, output_csv_file)
+                last_rescan = time.monotonic()
+
+            try:
+                waiting.add(pending_paths.get(timeout=SETTLE_TIME))
+                # Drain the burst of events a single copy usually produces
+                while True:
+                    waiting.add(pending_paths.get_nowait())
+            except queue.Empty:
+                pass
+
+            replacements = {}
+            for path in list(waiting):
+                if not os.path.exists(path):
+                    waiting.discard(path)
+                    continue
+                if time.time() - os.path.getmtime(path) < SETTLE_TIME:
+                    continue
+                waiting.discard(path)
+                try:
+                    ingest_file(path, index, index_file, output_csv_file, replacements)
+                except Exception as e:
+                    print(f"  [Error] An unexpected error occurred while processing {path}: {e}")
+            flush_replacements(replacements, index, index_file, output_csv_file)
+    finally:
+        observer.stop()
+        observer.join()
+
+def watch_with_polling(conversations_dir, index, index_file, output_csv_file, poll_interval):
+    """
+    Fallback watcher that rescans the folder every poll_interval seconds.
+    """
+    catch_up(conversations_dir, index, index_file, output_csv_file)
+    print(f"Watching '{conversations_dir}' for new conversations (polling every {poll_interval}s)...")
+    while True:
+        time.sleep(poll_interval)
+        scan_directory(conversations_dir, index, index_file, output_csv_file)
+
+# --- 5. MAIN SCRIPT LOGIC ---
+
+def watch_conversations(conversations_dir=CONVERSATIONS_DIR, output_csv_file=OUTPUT_CSV_FILE,
+                        index_file=INDEX_FILE, poll_interval=POLL_INTERVAL, force_polling=False):
+    """
+    Long-running ingest mode: labels whatever is new since the last run, then keeps
+    watching the folder and appends each new conversation to the labeled CSV.
+    """
+    index = load_index(index_file, output_csv_file)
+    print(f"Loaded index with {len(index['conversations'])} labeled conversations.")
+
+    try:
+        if Observer is not None and not force_polling:
+            watch_with_events(conversations_dir, index, index_file, output_csv_file)
+        else:
+            watch_with_polling(conversations_dir, index, index_file, output_csv_file, poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally label conversations dropped into a folder.")
+    parser.add_argument("--conversations-dir", default=CONVERSATIONS_DIR)
+    parser.add_argument("--output-csv", default=OUTPUT_CSV_FILE)
+    parser.add_argument("--index-file", default=INDEX_FILE)
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--poll", action="store_true", help="Force polling even if watchdog is installed.")
+    args = parser.parse_args()
+
+    watch_conversations(
+        conversations_dir=args.conversations_dir,
+        output_csv_file=args.output_csv,
+        index_file=args.index_file,
+        poll_interval=args.poll_interval,
+        force_polling=args.poll,
+    )
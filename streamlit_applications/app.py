@@ -17,6 +17,9 @@ from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_groq import ChatGroq
 
+from ml_model.approaches import (ENTITIES, LLM_MODEL_NAME,
+                                 LLM_PROMPT_TEMPLATES, analyze_with_regex,
+                                 find_flagged_turns, format_conversation_lines)
 from ml_model.predictor import CallAnalysisPredictor
 
 # Load environment variables from .env file
@@ -80,67 +83,8 @@ def parse_conversation_text(text_input, call_id_name="manual_input"):
                 return None, None
     return None, None
 
-
-def format_conversation_to_string(conversation_data):
-    """
-    Converts the structured conversation data into a single formatted string.
-    """
-    if not conversation_data:
-        return ""
-    
-    full_conversation = []
-    for entry in conversation_data:
-        speaker = entry.get("speaker", "Unknown")
-        text = entry.get("text", "")
-        stime = entry.get("stime", 0)
-        etime = entry.get("etime", 0)
-        full_conversation.append(f"[{stime}-{etime}] {speaker}: {text}")
-        
-    return "\n".join(full_conversation)
-
 # --- Analysis Functions ---
 
-def analyze_with_regex(conversation_text, entity):
-    """
-    Analyzes the conversation using regular expressions based on the selected entity.
-    """
-    if entity == "Profanity Detection":
-        # Simple regex for common profane words (add more as needed)
-        # Using \b for word boundaries to avoid matching words like "assist"
-        profanity_pattern= re.compile(
-        r'\b('
-        r'hell|damn|ass(hole)?|bitch|'
-        r'fuck(er|ing|ed)?|shit(ty)?|'
-        r'crap|piss(ed)?|bastard|cunt|dick|prick'
-        r')\b',
-        re.IGNORECASE
-    )
-        if profanity_pattern.search(conversation_text):
-            return "Found"
-        return "Not Found"
-
-    elif entity == "Privacy and Compliance Violation":
-        # Regex to find sensitive info like 'balance' or 'account'
-        sensitive_info_pattern = re.compile(r'\b(balance|account details)\b', re.IGNORECASE)
-        
-        # Regex to find verification phrases
-        verification_pattern = re.compile(r'\b(date of birth|address|social security number|ssn)\b', re.IGNORECASE)
-
-        sensitive_match = sensitive_info_pattern.search(conversation_text)
-        
-        if sensitive_match:
-            # Check if any verification phrase appears *before* the sensitive info
-            text_before_sensitive = conversation_text[:sensitive_match.start()]
-            if verification_pattern.search(text_before_sensitive):
-                # Verification happened before sensitive info was shared
-                return "Not Found"
-            else:
-                # Sensitive info shared without prior verification
-                return "Found"
-        return "Not Found"
-        
-    return "Not Applicable"
-
 def analyze_with_llm(conversation_text, entity, api_key):
     """
     Analyzes the conversation using a Groq LLM based on the selected entity.
@@ -151,31 +95,11 @@ def analyze_with_llm(conversation_text, entity, api_key):
 
     try:
         # Initialize the LLM
-        llm = ChatGroq(model_name="openai/gpt-oss-20b", temperature=0, max_tokens=None)
-
-        # Define prompts based on the entity
-        if entity == "Profanity Detection":
-            template = """
-            You are a call transcript analyst. Your task is to detect profanity in the following conversation.
-            Analyze the text and determine if any speaker uses profane language.
-            Respond with only "Found" or "Not Found".
-
-            Conversation:
-            {conversation}
-            """
-        elif entity == "Privacy and Compliance Violation":
-            template = """
-            You are a compliance analyst. Your task is to detect privacy violations in a call transcript.
-            A violation occurs if an agent shares sensitive information like a balance or account details
-            BEFORE verifying the customer's identity (e.g., asking for date of birth, address, or Social Security Number).
-
-            Analyze the conversation below. Does the agent share sensitive information before identity verification?
-            Respond with only "Found" if a violation occurred, or "Not Found" if it did not.
-
-            Conversation:
-            {conversation}
-            """
-        else:
+        llm = ChatGroq(model_name=LLM_MODEL_NAME, temperature=0, max_tokens=None)
+
+        # Pick the prompt for the selected entity
+        template = LLM_PROMPT_TEMPLATES.get(entity)
+        if template is None:
             return "Invalid entity for LLM analysis."
 
         prompt = PromptTemplate(template=template, input_variables=["conversation"])
@@ -193,9 +117,17 @@ def analyze_with_llm(conversation_text, entity, api_key):
         st.error(f"An error occurred with the LLM API: {e}")
         return None
     
-def analyze_with_ml_model(conversation_data, entity):
+@st.cache_resource
+def load_predictor():
+    """
+    Loads the ML models once per server process instead of on every analysis.
+    """
     predictor = CallAnalysisPredictor()
     predictor.load_models()
+    return predictor
+
+def analyze_with_ml_model(conversation_data, entity):
+    predictor = load_predictor()
     conversation_json = json.dumps(conversation_data, ensure_ascii=False)
     if entity == "Profanity Detection":
         profanity_result = predictor.predict_profanity(conversation_json)
@@ -208,6 +140,89 @@ def analyze_with_ml_model(conversation_data, entity):
             sensitive_result="Found"
         return sensitive_result
 
+# Minimum drop in the model's score when a turn is left out of its window
+# for the turn to be flagged in the viewer
+ML_LOCALIZATION_THRESHOLD = 0.2
+
+def localize_with_ml_model(conversation_data, entity):
+    """
+    Returns the turns the ML model scores as most likely to contain the violation,
+    scoring each turn by how much leaving it out of its window lowers the score.
+    """
+    predictor = load_predictor()
+    conversation_json = json.dumps(conversation_data, ensure_ascii=False)
+    if entity == "Profanity Detection":
+        localization = predictor.localize_profanity([conversation_json])[0]
+    else:
+        localization = predictor.localize_sensitive_data([conversation_json])[0]
+    return sorted(
+        turn for turn, score in localization["top_turns"] if score > ML_LOCALIZATION_THRESHOLD
+    )
+
+# --- Transcript Viewer ---
+
+TRANSCRIPT_PAGE_SIZES = (25, 50, 100)
+
+def jump_to_flagged_turn():
+    """
+    Moves the transcript viewer to the page holding the selected flagged turn.
+    """
+    turn = st.session_state.jump_to_turn
+    if turn is not None:
+        st.session_state.transcript_page = turn // st.session_state.transcript_page_size + 1
+
+def as_code_span(text):
+    """
+    Wraps text in a Markdown code span so transcript text such as "$250" or
+    "*" is shown verbatim instead of being rendered as LaTeX or emphasis.
+    """
+    longest_backticks = max((len(run) for run in re.findall(r'`+', text)), default=0)
+    fence = "`" * (longest_backticks + 1)
+    return f"{fence} {' '.join(text.splitlines())} {fence}"
+
+def render_transcript_viewer(conversation_lines, flagged_turns):
+    """
+    Shows one page of the transcript at a time with flagged turns highlighted,
+    so only the visible turns are sent to the browser on each rerun.
+    """
+    total_turns = len(conversation_lines)
+    if total_turns == 0:
+        st.warning("The conversation has no turns to display.")
+        return
+
+    nav_col1, nav_col2, nav_col3 = st.columns(3)
+    with nav_col1:
+        page_size = st.selectbox("Turns per page", TRANSCRIPT_PAGE_SIZES, key="transcript_page_size")
+
+    num_pages = (total_turns + page_size - 1) // page_size
+    # A larger page size can leave the current page out of range
+    if st.session_state.get("transcript_page", 1) > num_pages:
+        st.session_state.transcript_page = num_pages
+
+    with nav_col2:
+        page = st.number_input("Page", min_value=1, max_value=num_pages, step=1, key="transcript_page")
+    with nav_col3:
+        st.selectbox(
+            "Jump to violation",
+            [None] + flagged_turns,
+            format_func=lambda turn: "Select a flagged turn" if turn is None else f"Turn {turn + 1}",
+            key="jump_to_turn",
+            on_change=jump_to_flagged_turn,
+            disabled=not flagged_turns,
+        )
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, total_turns)
+    st.caption(f"Showing turns {start + 1}-{end} of {total_turns} · {len(flagged_turns)} flagged")
+
+    flagged = set(flagged_turns)
+    with st.container(height=400):
+        for i in range(start, end):
+            if i in flagged:
+                st.error(f"🚩 **Turn {i + 1}** {as_code_span(conversation_lines[i])}")
+            else:
+                st.text(f"Turn {i + 1} {conversation_lines[i]}")
+
 # --- Streamlit App UI ---
 
 st.set_page_config(layout="wide", page_title="Call Conversation Analyzer")
@@ -240,7 +255,7 @@ with st.sidebar:
 
     entity = st.selectbox(
         "Select Entity to Detect",
-        ("Profanity Detection", "Privacy and Compliance Violation")
+        ENTITIES
     )
 
     approach = st.selectbox(
@@ -255,6 +270,8 @@ with st.sidebar:
 if analyze_button:
     conversation_data = None
     call_id = None
+    # Drop the previous result so a failed parse does not leave it on screen
+    st.session_state.pop("analysis", None)
 
     if uploaded_file:
         conversation_data, call_id = parse_conversation_file(uploaded_file)
@@ -264,42 +281,60 @@ if analyze_button:
         st.warning("Please upload a file or paste content to analyze.")
 
     if conversation_data and call_id:
-        st.header("Analysis Result")
-        col1, col2 = st.columns(2)
+        # Format the transcript once per upload; paging reruns reuse it from session state
+        conversation_lines = format_conversation_lines(conversation_data)
+        conversation_string = "\n".join(conversation_lines)
+        result = "Not Analyzed"
+        # Only the approach that produced the result highlights turns; the LLM
+        # gives no turn-level evidence, so its transcript has no highlights
+        flagged_turns = []
+
+        # Perform analysis based on selected approach
+        if approach == "Pattern Matching (Regex)":
+            with st.spinner("Analyzing with Regex..."):
+                result = analyze_with_regex(conversation_string, entity)
+                flagged_turns = find_flagged_turns(conversation_lines, entity)
         
-        with col1:
-            st.info(f"**Call ID:** `{call_id}`")
-            st.info(f"**Entity:** `{entity}`")
-            st.info(f"**Approach:** `{approach}`")
-            
-            # Perform analysis based on selected approach
-            conversation_string = format_conversation_to_string(conversation_data)
-            result = "Not Analyzed"
-
-            if approach == "Pattern Matching (Regex)":
-                with st.spinner("Analyzing with Regex..."):
-                    result = analyze_with_regex(conversation_string, entity)
-            
-            elif approach == "LLM (Groq)":
-                with st.spinner("Analyzing with LLM..."):
-                    result = analyze_with_llm(conversation_string, entity, groq_api_key)
-            
-            elif approach == "Machine Learning":
-                # st.info("The Machine Learning model feature is currently under development.")
-                with st.spinner("Analyze with the ml model approach..."):
-                    result = analyze_with_ml_model(conversation_data, entity)
-                # result = "Not Implemented"
-
-            if result:
-                st.success(f"**Result:** {entity}: **{result}**")
+        elif approach == "LLM (Groq)":
+            with st.spinner("Analyzing with LLM..."):
+                result = analyze_with_llm(conversation_string, entity, groq_api_key)
         
-        with col2:
-            st.subheader("Full Conversation Transcript")
-            st.text_area(
-                "Conversation",
-                value=format_conversation_to_string(conversation_data),
-                height=400,
-                disabled=True
-            )
-else:
-    st.info("Upload a file or paste text and click 'Analyze Conversation' to see the results.")
\ No newline at end of file
+        elif approach == "Machine Learning":
+            with st.spinner("Analyze with the ml model approach..."):
+                result = analyze_with_ml_model(conversation_data, entity)
+                if result == "Found":
+                    try:
+                        flagged_turns = localize_with_ml_model(conversation_data, entity)
+                    except Exception as e:
+                        # Localization only drives highlighting; keep the result without highlights
+                        st.warning(f"Could not localize the violation with the ML model: {e}")
+
+        st.session_state.analysis = {
+            "call_id": call_id,
+            "entity": entity,
+            "approach": approach,
+            "result": result,
+            "conversation_lines": conversation_lines,
+            "flagged_turns": flagged_turns,
+        }
+        st.session_state.transcript_page = 1
+        st.session_state.jump_to_turn = None
+
+if "analysis" in st.session_state:
+    analysis = st.session_state.analysis
+    st.header("Analysis Result")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.info(f"**Call ID:** `{analysis['call_id']}`")
+        st.info(f"**Entity:** `{analysis['entity']}`")
+        st.info(f"**Approach:** `{analysis['approach']}`")
+
+        if analysis["result"]:
+            st.success(f"**Result:** {analysis['entity']}: **{analysis['result']}**")
+    
+    with col2:
+        st.subheader("Full Conversation Transcript")
+        render_transcript_viewer(analysis["conversation_lines"], analysis["flagged_turns"])
+elif not analyze_button:
+    st.info("Upload a file or paste text and click 'Analyze Conversation' to see the results.")
@@ -0,0 +1,87 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the repository root to Python path to import ml_model
+sys.path.append(str(Path(__file__).parent.parent))
+
+np = pytest.importorskip("numpy")
+predictor_module = pytest.importorskip("ml_model.predictor")
+
+# Same cut-off the app uses to flag turns
+THRESHOLD = 0.2
+
+
+def make_call(num_turns, offending_turns):
+    return json.dumps([
+        {"speaker": "Agent", "text": "damn it" if i in offending_turns else f"turn number {i}"}
+        for i in range(num_turns)
+    ])
+
+
+class StubScorer:
+    """
+    Scores a window 0.9 if it contains the offending word, else 0.1
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return np.array([0.9 if "damn" in text else 0.1 for text in texts])
+
+
+def localize(json_strings, **kwargs):
+    predictor = predictor_module.CallAnalysisPredictor()
+    return predictor.localize(json_strings, StubScorer(), **kwargs)
+
+
+def flagged(result):
+    return sorted(turn for turn, score in result["top_turns"] if score > THRESHOLD)
+
+
+@pytest.mark.parametrize("offending_turn", [0, 1, 7, 13, 14])
+def test_only_the_offending_turn_is_flagged(offending_turn):
+    result = localize([make_call(15, {offending_turn})])[0]
+
+    assert result["top_turns"][0][0] == offending_turn
+    assert flagged(result) == [offending_turn]
+    for turn, score in enumerate(result["turn_scores"]):
+        if turn != offending_turn:
+            assert score < THRESHOLD
+
+
+@pytest.mark.parametrize("window_size", [3, 5])
+def test_call_shorter_than_window(window_size):
+    result = localize([make_call(2, {1})], window_size=window_size)[0]
+
+    assert flagged(result) == [1]
+
+
+def test_calls_are_scored_in_one_batch():
+    scorer = StubScorer()
+    predictor = predictor_module.CallAnalysisPredictor()
+    results = predictor.localize([make_call(15, {3}), make_call(4, {0}), make_call(0, set())], scorer)
+
+    assert scorer.calls == 1
+    assert [flagged(result) for result in results] == [[3], [0], []]
+
+
+def test_stride_leaves_unscored_turns_out_of_top_turns():
+    result = localize([make_call(9, {4})], window_size=3, stride=2, top_k=9)[0]
+
+    assert np.isnan(result["turn_scores"][1])
+    assert [turn for turn, _ in result["top_turns"]] == [4, 0, 2, 6, 8]
+    assert flagged(result) == [4]
+
+
+def test_rejects_invalid_window_size():
+    with pytest.raises(ValueError):
+        localize([make_call(5, {2})], window_size=0)
+
+
+def test_rejects_stride_larger_than_window():
+    with pytest.raises(ValueError):
+        localize([make_call(9, {4})], window_size=3, stride=4)